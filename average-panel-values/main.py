@@ -6,15 +6,20 @@ import logging
 from datetime import datetime, timedelta
 from quixstreams.dataframe.windows import Mean
 
+from producer_profile import ProducerProfile
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+producer_profile = ProducerProfile.from_env()
+
 # Initialize the Quix Application
 app = Application(
     consumer_group="average-panel-values_v3",
     auto_create_topics=True,
-    auto_offset_reset="latest"
+    auto_offset_reset="latest",
+    producer_extra_config=producer_profile.producer_config()
 )
 
 # Define input and output topics
@@ -97,32 +102,34 @@ class PanelAggregator(Aggregator):
                 
             # Convert location_id to string to ensure it's hashable
             location_id = str(location_id).strip()
+            # and panel_id too, it is a key in the JSON window state
+            panel_id = str(panel_id)
             
             # Initialize location_panels as a dictionary if it doesn't exist
             if 'location_panels' not in old:
                 old['location_panels'] = {}
             if location_id not in old['location_panels']:
-                old['location_panels'][location_id] = []
+                old['location_panels'][location_id] = {}
                 
             # Initialize location_panel_count as a dictionary if it doesn't exist
             if 'location_panel_count' not in old:
                 old['location_panel_count'] = {}
-            if location_id not in old['location_panel_count']:
-                old['location_panel_count'][location_id] = 0
                 
         except (TypeError, AttributeError) as e:
             logger.error(f"Error processing location_id {location_id}: {e}")
             return old
 
         try:
-            # Add panel_id to the location's panel list if it's not already there
-            if panel_id not in old['location_panels'][location_id]:
-                old['location_panels'][location_id].append(panel_id)
-                old['location_panel_count'][location_id] = len(old['location_panels'][location_id])
+            # Panels are kept as a dict used as a set, for O(1) lookups. The state
+            # only lives for one window, so there is nothing to evict: dropping
+            # panels mid-window would skew the average against power_output_sum.
+            panels = old['location_panels'][location_id]
+            panels[panel_id] = 1
+            old['location_panel_count'][location_id] = len(panels)
                 
             # Debug output
             print(f"-- Updated state for location {location_id} --")
-            print(f"Panel IDs: {old['location_panels'][location_id]}")
+            print(f"Panel IDs: {list(panels)}")
             print(f"Panel count: {old['location_panel_count'][location_id]}")
             
             return old
@@ -0,0 +1,316 @@
+"""
+Compare the per-message mode (`app.run()`) of the enrichment and
+detect-danger services with their micro-batch mode (`run_batched`) for a
+range of batch sizes.
+
+Runs offline, no Kafka needed. The services' main.py is loaded as is and
+the Kafka consumer and producer are swapped for in-memory stubs, so the
+whole per-message path is timed: deserializing, the StreamingDataFrame,
+serializing and producing. The produced messages of every batch size,
+including their timestamps and headers, are checked against the
+per-message output. Needs the services' requirements installed:
+
+    python benchmarks/batch_size.py --messages 50000 --batch-sizes 1 10 100 1000 10000
+"""
+import argparse
+import contextlib
+import importlib.util
+import json
+import logging
+import os
+import random
+import runpy
+import sys
+import tempfile
+import time
+
+from confluent_kafka import TIMESTAMP_CREATE_TIME
+from quixstreams.models.topics import TopicAdmin, TopicConfig
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DATA_TOPIC = "solar-farm"
+CONFIG_TOPIC = "configuration"
+ENRICHED_TOPIC = "enriched_data"
+DANGER_TOPIC = "danger_condition"
+YEAR_NS = 365 * 24 * 3600 * 1_000_000_000
+
+
+class Drained(Exception):
+    """Raised by the stub consumer in batch mode once all messages are consumed."""
+
+
+class StubMessage:
+    """The parts of `confluent_kafka.Message` the services use."""
+
+    def __init__(self, topic, offset, key, value, timestamp, headers):
+        self._topic = topic
+        self._offset = offset
+        self._key = key
+        self._value = value
+        self._timestamp = timestamp
+        self._headers = headers
+
+    def topic(self):
+        return self._topic
+
+    def partition(self):
+        return 0
+
+    def offset(self):
+        return self._offset
+
+    def key(self):
+        return self._key
+
+    def value(self):
+        return self._value
+
+    def timestamp(self):
+        return TIMESTAMP_CREATE_TIME, self._timestamp
+
+    def headers(self):
+        return self._headers
+
+    def error(self):
+        return None
+
+    def leader_epoch(self):
+        return None
+
+    def __len__(self):
+        return len(self._value or b"") + len(self._key or b"")
+
+
+class StubConsumer:
+    def __init__(self, messages, raise_when_drained=False):
+        self._messages = iter(messages)
+        self._raise_when_drained = raise_when_drained
+        self._drained = False
+
+    def poll(self, timeout=None):
+        msg = next(self._messages, None)
+        if msg is None and self._raise_when_drained:
+            # The first empty poll ends the last batch, the next one stops the loop
+            if self._drained:
+                raise Drained
+            self._drained = True
+        return msg
+
+    def subscribe(self, topics, **kwargs):
+        pass
+
+    def commit(self, offsets=None, **kwargs):
+        return offsets or []
+
+    def assignment(self):
+        return []
+
+    def pause(self, partitions):
+        pass
+
+    def resume(self, partitions):
+        pass
+
+    def close(self):
+        pass
+
+
+class StubProducer:
+    def __init__(self):
+        self.produced = []
+
+    def produce(self, topic, value=None, key=None, headers=None, timestamp=None, **kwargs):
+        # No headers go out the same as an empty list, store both as None
+        self.produced.append((topic, key, value, headers or None, timestamp))
+
+    def poll(self, timeout=None):
+        return 0
+
+    def flush(self, timeout=None):
+        return 0
+
+    def __len__(self):
+        return 0
+
+    def __bool__(self):
+        # quixstreams checks the inner producer's truth value, not `is None`
+        return True
+
+
+def inspect_topics(self, topic_names, timeout=30):
+    return {name: TopicConfig(num_partitions=1, replication_factor=1) for name in topic_names}
+
+
+# Topics "exist" on the stub broker, the TopicAdmin would otherwise connect to Kafka
+TopicAdmin.inspect_topics = inspect_topics
+
+
+def load_module(service, module):
+    # Services are separate apps with clashing module names, load them by path.
+    spec = importlib.util.spec_from_file_location(
+        f"{service.replace('-', '_')}_{module}", os.path.join(ROOT, service, f"{module}.py"))
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def load_service(service, env):
+    """Run the service's main.py without starting it, returns its globals."""
+    path = os.path.join(ROOT, service)
+    os.environ.update(env, Quix__Broker__Address="localhost:9092", batch_size="0")
+    sys.path.insert(0, path)
+    try:
+        ns = runpy.run_path(os.path.join(path, "main.py"), run_name="benchmark")
+    finally:
+        sys.path.remove(path)
+    # The Application sets up INFO logging, keep the report readable
+    logging.getLogger("quixstreams").setLevel(logging.WARNING)
+    return ns
+
+
+def make_messages(count, locations=20, config_every=500):
+    now_ns = time.time_ns()
+    messages = []
+
+    def add(topic, key, value, headers=None):
+        offset = len(messages)
+        messages.append(StubMessage(topic, offset, key, json.dumps(value).encode(),
+                                    now_ns // 1_000_000 + offset, headers))
+
+    for i in range(count):
+        location_id = f"location-{i % locations}"
+        if i % config_every == 0:
+            add(CONFIG_TOPIC, None, {
+                "location": location_id,
+                "timestamp": now_ns,
+                "temperature": round(random.uniform(15, 35), 1),
+                "cloud_cover": random.randint(0, 100),
+            })
+        add(DATA_TOPIC, f"panel-{i % 1000}".encode(), {
+            "panel_id": f"panel-{i % 1000}",
+            "location_id": location_id,
+            "temperature": round(random.uniform(10, 40), 2),
+            "power_output": round(random.uniform(0, 400), 2),
+            "irradiance": round(random.uniform(0, 1000), 2),
+            # spread over a year so DST changes are covered
+            "timestamp": now_ns - random.randrange(YEAR_NS),
+        }, headers=[("source", b"benchmark")] if i % 2 else None)
+    return messages
+
+
+def as_input(produced, topic):
+    """Turn the produced messages of one service into input messages of the next."""
+    return [StubMessage(topic, offset, key, value, timestamp, headers)
+            for offset, (_, key, value, headers, timestamp) in enumerate(produced)]
+
+
+def run_per_message(service, env, messages):
+    ns = load_service(service, env)
+    app = ns["app"]
+    producer = StubProducer()
+    app._consumer._inner_consumer = StubConsumer(messages)
+    app._producer._producer._inner_producer = producer
+
+    start = time.perf_counter()
+    app.run(count=len(messages))
+    return time.perf_counter() - start, producer.produced
+
+
+class StubApp:
+    """Hands the stubs to `run_batched` in place of the Application's clients."""
+
+    def __init__(self, app, messages):
+        self._app = app
+        self.consumer = StubConsumer(messages, raise_when_drained=True)
+        self.producer = StubProducer()
+
+    def get_producer(self):
+        producer = self._app.get_producer()
+        producer._inner_producer = self.producer
+        return producer
+
+    def get_consumer(self, auto_commit_enable=True):
+        consumer = self._app.get_consumer(auto_commit_enable=auto_commit_enable)
+        consumer._inner_consumer = self.consumer
+        return consumer
+
+
+def run_batch(service, env, messages, batch_size, input_topics, get_process_batch):
+    ns = load_service(service, env)
+    batching = load_module(service, "batching")
+    app = StubApp(ns["app"], messages)
+    topics = [ns[name] for name in input_topics]
+
+    start = time.perf_counter()
+    with contextlib.suppress(Drained):
+        batching.run_batched(app, topics, ns["output_topic"], get_process_batch(ns),
+                             batch_size, timeout=1)
+    return time.perf_counter() - start, app.producer.produced
+
+
+def enrichment_process_batch(ns):
+    # Same as the batch branch of enrichment/main.py
+    enrich_batch = load_module("enrichment", "batch_transforms").enrich_batch
+    return lambda records: enrich_batch(records, ns["input_config_topic"].name,
+                                        ns["save_config"], ns["get_config_for_location"])
+
+
+def detect_danger_process_batch(ns):
+    return load_module("detect-danger", "batch_transforms").process_batch
+
+
+SERVICES = [
+    ("enrichment",
+     {"data_topic": DATA_TOPIC, "config_topic": CONFIG_TOPIC, "output": ENRICHED_TOPIC},
+     ["input_data_topic", "input_config_topic"], enrichment_process_batch),
+    ("detect-danger",
+     {"input": ENRICHED_TOPIC, "output": DANGER_TOPIC},
+     ["input_topic"], detect_danger_process_batch),
+]
+
+
+def best_of(repeat, fn, *args):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        elapsed, result = fn(*args)
+        best = min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=50_000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 10, 100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    messages = make_messages(args.messages)
+    # The Applications create their state dir in the working directory
+    os.chdir(tempfile.mkdtemp())
+    print(f"{'service':>14} {'mode':>12} {'msg/s':>12} {'us/msg':>8} {'speedup':>8}")
+    for service, env, input_topics, get_process_batch in SERVICES:
+        # The services print to stdout (detect-danger prints every row), keep
+        # that in the timing but out of the report
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            baseline, expected = best_of(args.repeat, run_per_message, service, env, messages)
+            results = [(batch_size, *best_of(args.repeat, run_batch, service, env, messages,
+                                             batch_size, input_topics, get_process_batch))
+                       for batch_size in args.batch_sizes]
+
+        count = len(messages)
+        print(f"{service:>14} {'per-message':>12} {count / baseline:>12,.0f} "
+              f"{baseline / count * 1e6:>8.2f} {1:>8.2f}")
+        for batch_size, elapsed, produced in results:
+            if produced != expected:
+                raise RuntimeError(f"{service} batch_size={batch_size} output differs "
+                                   f"from the per-message output")
+            print(f"{service:>14} {f'batch={batch_size}':>12} {count / elapsed:>12,.0f} "
+                  f"{elapsed / count * 1e6:>8.2f} {baseline / elapsed:>8.2f}")
+
+        # The enriched messages are the input of detect-danger
+        messages = as_input(expected, ENRICHED_TOPIC)
+
+
+if __name__ == "__main__":
+    main()
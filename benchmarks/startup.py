@@ -0,0 +1,134 @@
+"""
+Measure service cold start: time from process start to the first message
+consumed from Kafka (or produced, for the sources), or to the first HTTP
+request served for http-api-source.
+
+Each run starts `python main.py` in the service folder with the current
+environment, so Kafka settings (Quix__Sdk__Token or Quix__Broker__Address)
+and the service variables must be set, e.g. through a .env file in the
+service folder. Consumers need data arriving on their input topics.
+
+    python benchmarks/startup.py enrichment detect-danger http-api-source --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HTTP_SERVICES = {'http-api-source'}
+
+MARKER = 'STARTUP_BENCHMARK_READY'
+
+# Runs main.py with confluent_kafka's Consumer/Producer swapped for subclasses
+# that print MARKER on the first message, before quixstreams imports them.
+BOOTSTRAP = f'''
+import runpy, sys
+import confluent_kafka
+
+def _ready(event):
+    global _ready
+    print("{MARKER} " + event, file=sys.stderr, flush=True)
+    _ready = lambda event: None
+
+class Consumer(confluent_kafka.Consumer):
+    def poll(self, *args, **kwargs):
+        msg = super().poll(*args, **kwargs)
+        if msg is not None and msg.error() is None:
+            _ready("consumed")
+        return msg
+
+    def consume(self, *args, **kwargs):
+        msgs = super().consume(*args, **kwargs)
+        if any(msg.error() is None for msg in msgs):
+            _ready("consumed")
+        return msgs
+
+class Producer(confluent_kafka.Producer):
+    def produce(self, *args, **kwargs):
+        _ready("produced")
+        return super().produce(*args, **kwargs)
+
+confluent_kafka.Consumer = Consumer
+confluent_kafka.Producer = Producer
+
+sys.argv = ["main.py"]
+runpy.run_path("main.py", run_name="__main__")
+'''
+
+
+def watch_stderr(proc):
+    """Drain the service's stderr, returns an Event set once MARKER shows up."""
+    found = threading.Event()
+
+    def read():
+        for line in proc.stderr:
+            if line.startswith(MARKER):
+                found.set()
+
+    threading.Thread(target=read, daemon=True).start()
+    return found
+
+
+def wait_for_http(proc, url, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and proc.poll() is None:
+        try:
+            with urllib.request.urlopen(url, timeout=1):
+                return True
+        except urllib.error.HTTPError:
+            # Any HTTP response means the server is serving requests
+            return True
+        except (urllib.error.URLError, ConnectionError, OSError):
+            time.sleep(0.01)
+    return False
+
+
+def run_once(service, timeout, port):
+    env = dict(os.environ, PYTHONUNBUFFERED='1', port=str(port))
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, '-c', BOOTSTRAP], cwd=os.path.join(ROOT, service),
+                            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    marker = watch_stderr(proc)
+    try:
+        if service in HTTP_SERVICES:
+            ready = wait_for_http(proc, f'http://127.0.0.1:{port}/data/last', timeout)
+        else:
+            ready = marker.wait(timeout)
+        elapsed = time.perf_counter() - start
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+    return elapsed if ready else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('services', nargs='+')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--timeout', type=float, default=120)
+    parser.add_argument('--port', type=int, default=8080, help='port for the HTTP services')
+    args = parser.parse_args()
+
+    print(f"{'service':>22} {'min s':>8} {'median s':>9} {'failed':>7}")
+    for service in args.services:
+        results = [run_once(service, args.timeout, args.port) for _ in range(args.runs)]
+        times = [t for t in results if t is not None]
+        failed = len(results) - len(times)
+        if times:
+            print(f"{service:>22} {min(times):>8.2f} {statistics.median(times):>9.2f} {failed:>7}")
+        else:
+            print(f"{service:>22} {'-':>8} {'-':>9} {failed:>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,32 @@
+def check_for_danger_batch(rows):
+    """
+    Batch version of `check_for_danger`.
+
+    Returns `(index, event)` tuples for the rows where danger was detected,
+    in input order, where `index` points into `rows`.
+    """
+    events = []
+    for i, row in enumerate(rows):
+        if not (isinstance(row, dict) and 'data' in row and 'configuration' in row):
+            continue
+        data, config = row['data'], row['configuration']
+        if 'temperature' not in config:
+            continue
+        if (float(data['temperature']) > 25 and float(config['temperature']) > 26.5
+                and float(config['cloud_cover']) < 50):
+            events.append((i, {
+                'timestamp': row['timestamp'],
+                'danger_detected': True,
+                'panel_temperature': data['temperature'],
+                'panel_id': data['panel_id'],
+                'forecast_temperature': config['temperature']
+            }))
+    return events
+
+
+def process_batch(records):
+    """Batch mode entry point, see `batching.run_batched`."""
+    messages = [msg for _, msg in records]
+    events = check_for_danger_batch([msg.value for msg in messages])
+    return [(messages[i].key, event, messages[i].timestamp, messages[i].headers)
+            for i, event in events]
@@ -2,17 +2,26 @@ import os
 from quixstreams import Application
 from datetime import datetime
 
+from producer_profile import ProducerProfile
+
 # for local dev, load env vars from a .env file
 from dotenv import load_dotenv
 load_dotenv()
 
+producer_profile = ProducerProfile.from_env()
+
 app = Application(consumer_group='danger-v3.5', 
                 auto_offset_reset='earliest', 
-                use_changelog_topics=False)
+                use_changelog_topics=False,
+                producer_extra_config=producer_profile.producer_config())
 
 input_topic = app.topic(os.environ['input'])
 output_topic = app.topic(os.environ['output'])
 
+# batch_size > 0 switches from per-message processing to micro-batches
+batch_size = int(os.getenv('batch_size', '0'))
+batch_timeout = float(os.getenv('batch_timeout', '1'))
+
 sdf = app.dataframe(input_topic)
 
 # Filter items out without data and config values.
@@ -58,4 +67,11 @@ sdf = sdf[sdf['danger_detected'] == True]
 sdf.to_topic(output_topic)
 
 if __name__ == '__main__':
-    app.run()
\ No newline at end of file
+    if batch_size > 0:
+        # Only batch mode needs these, keep them out of the default startup
+        from batching import run_batched
+        from batch_transforms import process_batch
+
+        run_batched(app, [input_topic], output_topic, process_batch, batch_size, batch_timeout)
+    else:
+        app.run()
\ No newline at end of file
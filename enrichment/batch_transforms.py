@@ -0,0 +1,29 @@
+from datetime import datetime
+
+
+def enrich_batch(records, config_topic, save_config, get_config_for_location):
+    """
+    Batch version of the enrichment stage.
+
+    `records` are `(topic_name, message)` tuples from both input topics in
+    consumed order. Config messages are saved as they are met, so each data
+    message is enriched with the config that was current at its position.
+    Returns `(key, value, timestamp, headers)` tuples for the data messages
+    in input order, with the timestamp and headers of the input message.
+
+    The timestamp is converted per message with `datetime.fromtimestamp`, as
+    the local UTC offset depends on the date (DST) and the output has to
+    match the per-message path exactly.
+    """
+    enriched = []
+    for topic, msg in records:
+        if topic == config_topic:
+            save_config(msg.value)
+            continue
+        row = msg.value
+        enriched.append((msg.key, {
+            "timestamp": str(datetime.fromtimestamp(row["timestamp"]/1000/1000/1000)),
+            "data": row,
+            "configuration": get_config_for_location(row["location_id"])
+        }, msg.timestamp, msg.headers))
+    return enriched
@@ -0,0 +1,69 @@
+import logging
+import signal
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def poll_batch(consumer, batch_size, timeout):
+    """
+    Poll up to `batch_size` messages, waiting at most `timeout` seconds
+    for the batch to fill up.
+    """
+    messages = []
+    deadline = time.monotonic() + timeout
+    while len(messages) < batch_size:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        msg = consumer.poll(remaining)
+        if msg is None:
+            break
+        if msg.error():
+            logger.error(f"Consumer error: {msg.error()}")
+            continue
+        messages.append(msg)
+    return messages
+
+
+def run_batched(app, input_topics, output_topic, process_batch, batch_size, timeout=1.0):
+    """
+    Run the service in micro-batch mode instead of `app.run()`.
+
+    Messages from `input_topics` are pulled in batches of up to `batch_size`
+    and handed to `process_batch` as a list of `(topic_name, message)` tuples
+    in the order they were consumed, where `message` has the deserialized
+    `key` and `value` and the input `timestamp` and `headers`.
+    `process_batch` returns a list of `(key, value, timestamp, headers)` tuples
+    which are produced to `output_topic` in that order. Pass the timestamp and
+    headers of the input message through, like `to_topic()` does in the
+    per-message mode. Offsets are committed once the batch has been flushed,
+    so delivery stays at-least-once.
+    """
+    topics = {topic.name: topic for topic in input_topics}
+    running = True
+
+    def handle_sigterm(signum, frame):
+        nonlocal running
+        running = False
+
+    signal.signal(signal.SIGTERM, handle_sigterm)
+
+    with app.get_producer() as producer, app.get_consumer(auto_commit_enable=False) as consumer:
+        consumer.subscribe(list(topics))
+        logger.info(f"Running in batch mode, batch_size={batch_size}, timeout={timeout}s")
+
+        while running:
+            messages = poll_batch(consumer, batch_size, timeout)
+            if not messages:
+                continue
+
+            records = [(msg.topic(), topics[msg.topic()].deserialize(msg)) for msg in messages]
+            for key, value, timestamp, headers in process_batch(records):
+                out = output_topic.serialize(key=key, value=value, headers=headers)
+                # A None key is sent as is, like in the per-message mode
+                producer.produce(topic=output_topic.name, key=None if key is None else out.key,
+                                 value=out.value, headers=out.headers, timestamp=timestamp)
+
+            producer.flush()
+            consumer.commit()
@@ -0,0 +1,104 @@
+import sys
+import time
+
+# Helpers to keep per-key state bounded in long-running services.
+#
+# They work on plain dicts that map a key to its last-seen time. Keys are
+# re-inserted when touched, so dict order is last-seen order and the oldest
+# entries are always at the front: eviction never scans the whole dict. As
+# the dicts stay plain they can also live in quixstreams state (JSON).
+
+_MISSING = object()
+
+
+def intern_key(key):
+    """Normalize a key to a stripped, interned str so repeated keys share memory."""
+    return sys.intern(str(key).strip())
+
+
+def touch(entries, key, now):
+    """Mark `key` as seen at `now`, moving it to the back of the eviction order."""
+    entries.pop(key, None)
+    entries[key] = now
+
+
+def evict(entries, now, ttl=None, max_items=None):
+    """
+    Drop entries last seen more than `ttl` before `now`, then the oldest
+    entries until at most `max_items` are left. Returns the evicted keys.
+    """
+    evicted = []
+    for key, seen in entries.items():
+        expired = ttl is not None and now - seen > ttl
+        oversize = max_items is not None and len(entries) - len(evicted) > max_items
+        if not (expired or oversize):
+            break
+        evicted.append(key)
+    for key in evicted:
+        del entries[key]
+    return evicted
+
+
+def approx_size(obj):
+    """Approximate deep size in bytes of dicts, lists and scalars."""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(approx_size(k) + approx_size(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(approx_size(v) for v in obj)
+    return size
+
+
+class BoundedDict:
+    """
+    Dict with TTL and max size eviction, for in-memory per-key state.
+
+    The TTL counts from the last write of a key, reads don't refresh it.
+    """
+
+    def __init__(self, max_items=None, ttl=None, clock=time.monotonic):
+        self.max_items = max_items
+        self.ttl = ttl
+        self.clock = clock
+        self.evicted = 0
+        self._seen = {}
+        self._values = {}
+
+    def __len__(self):
+        self._evict()
+        return len(self._values)
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        key = intern_key(key)
+        touch(self._seen, key, self.clock())
+        self._values[key] = value
+        self._evict()
+
+    def get(self, key, default=None):
+        key = intern_key(key)
+        seen = self._seen.get(key)
+        if seen is None or (self.ttl is not None and self.clock() - seen > self.ttl):
+            return default
+        return self._values[key]
+
+    def _evict(self):
+        for key in evict(self._seen, self.clock(), self.ttl, self.max_items):
+            del self._values[key]
+            self.evicted += 1
+
+    def stats(self):
+        self._evict()
+        return {'items': len(self._values), 'evicted': self.evicted}
+
+    def approx_bytes(self):
+        """Deep size estimate, walks every value so don't call it per message."""
+        return approx_size(self._seen) + approx_size(self._values)
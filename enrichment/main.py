@@ -1,36 +1,61 @@
 import os
+import time
 from quixstreams import Application
 from datetime import datetime
 
+from bounded_state import BoundedDict
+from producer_profile import ProducerProfile
+
 # for local dev, load env vars from a .env file
 from dotenv import load_dotenv
 load_dotenv()
 
+producer_profile = ProducerProfile.from_env()
+
 app = Application(consumer_group="enrichment-v1", 
                     auto_offset_reset="earliest", 
-                    use_changelog_topics=False)
+                    use_changelog_topics=False,
+                    producer_extra_config=producer_profile.producer_config())
 
 input_data_topic = app.topic(os.environ["data_topic"])
 input_config_topic = app.topic(os.environ["config_topic"])
 output_topic = app.topic(os.environ["output"])
 
+# batch_size > 0 switches from per-message processing to micro-batches
+batch_size = int(os.getenv("batch_size", "0"))
+batch_timeout = float(os.getenv("batch_timeout", "1"))
+
 data_sdf = app.dataframe(input_data_topic)
 config_sdf = app.dataframe(input_config_topic)
 
-last_config = {}
+# Latest config per location, locations not updated within config_ttl are dropped
+last_config = BoundedDict(max_items=int(os.getenv("config_max_locations", "10000")),
+                          ttl=float(os.getenv("config_ttl", "86400")))
+# Evictions can happen on every config message once the cap is reached, and
+# approx_bytes walks the whole state, so both are only logged this often (seconds)
+EVICTION_LOG_INTERVAL = 60
+STATE_SIZE_LOG_INTERVAL = 300
+last_eviction_log = last_size_log = time.monotonic()
+logged_evicted = 0
 
 def save_config(data):
-    global last_config
+    global last_eviction_log, last_size_log, logged_evicted
     last_config[data["location"]] = data
+    now = time.monotonic()
+    if last_config.evicted != logged_evicted and now - last_eviction_log >= EVICTION_LOG_INTERVAL:
+        print(f"Evicted {last_config.evicted - logged_evicted} location configs, "
+              f"items: {len(last_config)}, evicted: {last_config.evicted}")
+        last_eviction_log = now
+        logged_evicted = last_config.evicted
+    if now - last_size_log >= STATE_SIZE_LOG_INTERVAL:
+        last_size_log = now
+        print(f"Location config state, items: {len(last_config)}, approx bytes: {last_config.approx_bytes()}")
     # print("--config------")
     # print(last_config)
     # print("--------------")
 
 def get_config_for_location(location):
-    if location in last_config:
-        return last_config[location]
-    else:
-        return {}
+    return last_config.get(location, {})
 
 config_sdf.apply(save_config)
 
@@ -51,7 +76,18 @@ data_sdf = data_sdf.apply(lambda row: {
 data_sdf.to_topic(output_topic)
 
 if __name__ == "__main__":
-    app.run()
+    if batch_size > 0:
+        # Only batch mode needs these, keep them out of the default startup
+        from batching import run_batched
+        from batch_transforms import enrich_batch
+
+        def process_batch(records):
+            return enrich_batch(records, input_config_topic.name, save_config, get_config_for_location)
+
+        run_batched(app, [input_data_topic, input_config_topic], output_topic,
+                    process_batch, batch_size, batch_timeout)
+    else:
+        app.run()
 
 # import os
 # from quixstreams import Application
@@ -8,6 +8,8 @@ import time
 import sys
 import os
 
+from producer_profile import ProducerProfile
+
 # Load environment variables (useful when working locally)
 from dotenv import load_dotenv
 load_dotenv()
@@ -56,8 +58,11 @@ mqtt_client.tls_set(tls_version = mqtt.client.ssl.PROTOCOL_TLS)  # we'll be usin
 mqtt_client.reconnect_delay_set(5, 60)
 configure_authentication(mqtt_client)
 
+# Batching/compression settings for the producer, see producer_profile.py
+producer_profile = ProducerProfile.from_env()
+
 # Create a Quix Application, this manages the connection to the Quix platform
-app = Application()
+app = Application(producer_extra_config=producer_profile.producer_config())
 # Create the producer, this is used to write data to the output topic
 producer = app.get_producer()
 # create a topic object for use later on
@@ -82,6 +87,7 @@ def on_message_cb(client: paho.Client, userdata: any, msg: paho.MQTTMessage):
     producer.produce(topic=output_topic.name,
                     key=message_key,
                     value=msg.payload)
+    producer_profile.after_produce(producer)
 
 # print which topic was subscribed to
 def on_subscribe_cb(client: paho.Client, userdata: any, mid: int,
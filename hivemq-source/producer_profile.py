@@ -0,0 +1,194 @@
+# Shared module: every service that produces to Kafka has an identical copy,
+# as each service is built from its own folder. Edit all copies together,
+# scripts/check_shared_modules.py fails when they differ.
+import json
+import os
+import threading
+import time
+
+# Size/latency presets, selected with the `producer_profile` env var.
+PROFILES = {
+    'latency': {
+        'compression': 'lz4',
+        'min_linger_ms': 0,
+        'max_linger_ms': 5,
+        'batch_size': 16 * 1024,
+        'target_batch_messages': 10,
+    },
+    'balanced': {
+        'compression': 'lz4',
+        'min_linger_ms': 1,
+        'max_linger_ms': 50,
+        'batch_size': 256 * 1024,
+        'target_batch_messages': 200,
+    },
+    'throughput': {
+        'compression': 'zstd',
+        'min_linger_ms': 5,
+        'max_linger_ms': 200,
+        'batch_size': 1024 * 1024,
+        'target_batch_messages': 1000,
+    },
+}
+
+COMPRESSION_TYPES = ('none', 'gzip', 'snappy', 'lz4', 'zstd')
+
+
+class ProducerProfile:
+    """
+    Batching and compression settings for a service's producer.
+
+    Without `producer_profile` the librdkafka defaults are kept, apart from
+    settings overridden with their own env var (e.g. `producer_compression`).
+    With a profile (latency, balanced or throughput) its settings apply and
+    can be overridden the same way, e.g. `producer_max_linger_ms=100`.
+
+    With a profile, librdkafka is configured with the widest linger
+    (`max_linger_ms`), so bursts are sent in full batches. Services that
+    call `produce()` themselves call `after_produce()` after each message,
+    from any thread. It only records the arrival time and serves delivery
+    callbacks. A background thread flushes the queue every `min_linger_ms`
+    while the rate is too low to collect `target_batch_messages` within
+    `max_linger_ms`, so latency stays tight under low load. Services that
+    produce with `to_topic()` don't call it and only get the static
+    `max_linger_ms` linger.
+
+    Achieved batch size and compression ratio per topic are read from the
+    librdkafka statistics and printed every `producer_metrics_interval`
+    seconds; the latest values are kept in `metrics`.
+    """
+
+    def __init__(self, compression=None, min_linger_ms=None, max_linger_ms=None,
+                 batch_size=None, target_batch_messages=None, metrics_interval=60):
+        if compression is not None and compression not in COMPRESSION_TYPES:
+            raise ValueError(f'producer_compression must be one of {", ".join(COMPRESSION_TYPES)}')
+        if (min_linger_ms is not None and max_linger_ms is not None
+                and min_linger_ms > max_linger_ms):
+            raise ValueError('producer_min_linger_ms must not be greater than producer_max_linger_ms')
+
+        self.compression = compression
+        self.min_linger_ms = min_linger_ms
+        self.max_linger_ms = max_linger_ms
+        self.batch_size = batch_size
+        self.target_batch_messages = target_batch_messages
+        self.metrics_interval = metrics_interval
+        self.metrics = {}
+
+        # after_produce can be called from several threads (e.g. waitress)
+        self._lock = threading.Lock()
+        self._produced = threading.Event()
+        self._gap_ewma = None
+        self._last_produce = None
+        self._flusher = None
+
+    @classmethod
+    def from_env(cls):
+        # Unset deployment variables can come through as empty strings
+        def setting(name, default=None, cast=str):
+            value = os.getenv(name) or default
+            return None if value is None else cast(value)
+
+        name = setting('producer_profile')
+        if name is not None and name not in PROFILES:
+            raise ValueError(f'producer_profile must be one of {", ".join(PROFILES)}')
+        profile = PROFILES.get(name, {})
+
+        return cls(
+            compression=setting('producer_compression', profile.get('compression')),
+            min_linger_ms=setting('producer_min_linger_ms', profile.get('min_linger_ms'), float),
+            max_linger_ms=setting('producer_max_linger_ms', profile.get('max_linger_ms'), float),
+            batch_size=setting('producer_batch_size', profile.get('batch_size'), int),
+            target_batch_messages=setting('producer_target_batch_messages',
+                                          profile.get('target_batch_messages'), int),
+            metrics_interval=setting('producer_metrics_interval', 60, int),
+        )
+
+    @property
+    def adaptive(self):
+        return (self.min_linger_ms is not None and self.max_linger_ms is not None
+                and self.target_batch_messages is not None)
+
+    def producer_config(self):
+        """librdkafka settings, pass as `producer_extra_config` to the Application."""
+        config = {}
+        if self.compression is not None:
+            config['compression.type'] = self.compression
+        if self.max_linger_ms is not None:
+            config['linger.ms'] = self.max_linger_ms
+        if self.batch_size is not None:
+            config['batch.size'] = self.batch_size
+        if self.metrics_interval > 0:
+            config['statistics.interval.ms'] = self.metrics_interval * 1000
+            config['stats_cb'] = self.on_stats
+        return config
+
+    def after_produce(self, producer):
+        """Record the message arrival, never blocks."""
+        now = time.monotonic()
+        with self._lock:
+            if self._last_produce is not None:
+                gap = now - self._last_produce
+                self._gap_ewma = gap if self._gap_ewma is None else 0.9 * self._gap_ewma + 0.1 * gap
+            self._last_produce = now
+
+            if self.adaptive and self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, args=(producer,), daemon=True)
+                self._flusher.start()
+
+        self._produced.set()
+        producer.poll(0)
+
+    def _low_load(self):
+        with self._lock:
+            gap_ewma, last_produce = self._gap_ewma, self._last_produce
+        if gap_ewma is None:
+            return True
+        # A long pause since the last message also counts as a low rate
+        gap = max(gap_ewma, time.monotonic() - last_produce)
+        return self.target_batch_messages * gap * 1000 > self.max_linger_ms
+
+    def _flush_loop(self, producer):
+        # At a low rate a batch can't fill up within max_linger_ms, waiting for
+        # it only adds latency. Sending happens here, off the produce path.
+        interval = max(self.min_linger_ms, 1) / 1000
+        while True:
+            # Sleep until something is produced, an idle service never wakes up
+            self._produced.wait()
+            self._produced.clear()
+            while len(producer):
+                time.sleep(interval)
+                if self._low_load():
+                    producer.flush(interval)
+
+    def on_stats(self, stats_json):
+        stats = json.loads(stats_json)
+        # The admin client gets the same config and also reports as a producer,
+        # it never sends messages though
+        if not stats.get('txmsgs'):
+            return
+
+        self.metrics = {
+            'compression': self.compression,
+            'topics': {name: self._topic_metrics(topic)
+                       for name, topic in stats.get('topics', {}).items()},
+        }
+        print(f"Producer metrics: {json.dumps(self.metrics)}")
+
+    @staticmethod
+    def _topic_metrics(topic):
+        batch_bytes = topic.get('batchsize', {}).get('avg', 0)
+        batch_messages = topic.get('batchcnt', {}).get('avg', 0)
+        # Uncompressed bytes per message, from the partition counters. The
+        # internal partition (-1) only holds messages not yet assigned.
+        partitions = [p for p in topic.get('partitions', {}).values() if p.get('partition', -1) >= 0]
+        tx_msgs = sum(p.get('txmsgs', 0) for p in partitions)
+        tx_bytes = sum(p.get('txbytes', 0) for p in partitions)
+        # Approximate: uncompressed bytes of an average batch over its size on
+        # the wire, batch framing included, so uncompressed batches are just below 1
+        compression_ratio = (batch_messages * tx_bytes / tx_msgs / batch_bytes
+                             if tx_msgs and batch_bytes else None)
+        return {
+            'avg_batch_bytes': batch_bytes,
+            'avg_batch_messages': batch_messages,
+            'compression_ratio': compression_ratio,
+        }
@@ -2,7 +2,6 @@ import os
 import datetime
 import json
 from flask import Flask, request, Response, redirect, jsonify
-from flasgger import Swagger
 from waitress import serve
 import time
 from typing import Dict, Any, Optional
@@ -10,6 +9,7 @@ from typing import Dict, Any, Optional
 from flask_cors import CORS
 
 from setup_logging import get_logger
+from producer_profile import ProducerProfile
 from quixstreams import Application
 
 # Global variable to store the last received data
@@ -22,7 +22,9 @@ load_dotenv()
 
 service_url = os.environ["Quix__Deployment__Network__PublicUrl"]
 
-quix_app = Application()
+producer_profile = ProducerProfile.from_env()
+
+quix_app = Application(producer_extra_config=producer_profile.producer_config())
 topic = quix_app.topic(os.environ["output"])
 producer = quix_app.get_producer()
 
@@ -33,16 +35,25 @@ app = Flask(__name__)
 # Enable CORS for all routes and origins by default
 CORS(app)
 
-app.config['SWAGGER'] = {
-    'title': 'HTTP API Source',
-    'description': 'Test your HTTP API with this Swagger interface. Send data and see it arrive in Quix.',
-    'uiversion': 3
-}
+# Swagger UI pulls in flasgger and builds the spec at startup,
+# set swagger=false for a faster start when the UI isn't needed.
+swagger_enabled = os.getenv("swagger", "true").lower() == "true"
+
+if swagger_enabled:
+    from flasgger import Swagger
+
+    app.config['SWAGGER'] = {
+        'title': 'HTTP API Source',
+        'description': 'Test your HTTP API with this Swagger interface. Send data and see it arrive in Quix.',
+        'uiversion': 3
+    }
 
-swagger = Swagger(app)
+    swagger = Swagger(app)
 
 @app.route("/", methods=['GET'])
 def redirect_to_swagger():
+    if not swagger_enabled:
+        return jsonify({"status": "success", "message": "Swagger UI is disabled"})
     return redirect("/apidocs/")
 
 @app.route("/data/", methods=['POST'])
@@ -71,6 +82,7 @@ def post_data_without_key():
     last_key = None  # No key for this endpoint
 
     producer.produce(topic.name, json.dumps(data))
+    producer_profile.after_produce(producer)
 
     return jsonify({"status": "success", "message": "Data received and processed"})
 
@@ -104,6 +116,7 @@ def post_data_with_key(key: str):
     last_key = key
 
     producer.produce(topic.name, json.dumps(data), key.encode())
+    producer_profile.after_produce(producer)
 
     return jsonify({"status": "success", "message": f"Data with key '{key}' received and processed"})
 
@@ -134,13 +147,26 @@ def resend_last_data():
     global last_data, last_key
     if last_data and last_key is not None:
         producer.produce(topic.name, json.dumps(last_data), last_key.encode())
+        producer_profile.after_produce(producer)
         return jsonify({"status": "success", "message": f"Data with key '{last_key}' resent successfully"})
     elif last_data and last_key is None:
         producer.produce(topic.name, json.dumps(last_data))
+        producer_profile.after_produce(producer)
         return jsonify({"status": "success", "message": "Data resent successfully"})
     else:
         return jsonify({"status": "error", "message": "No last data to resend"})
 
+@app.route("/producer/metrics", methods=['GET'])
+def get_producer_metrics():
+    """
+    Get the producer batching and compression metrics
+    ---
+    responses:
+      200:
+        description: Latest producer metrics
+    """
+    return jsonify({"status": "success", "data": producer_profile.metrics})
+
 if __name__ == '__main__':
     print("=" * 60)
     print(" " * 20 + "CURL EXAMPLE")
@@ -155,4 +181,4 @@ curl -L -X POST \\
     )
     print("=" * 60)
 
-    serve(app, host="0.0.0.0", port=80)
\ No newline at end of file
+    serve(app, host="0.0.0.0", port=int(os.getenv("port", "80")))
\ No newline at end of file
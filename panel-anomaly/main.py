@@ -0,0 +1,71 @@
+import os
+from quixstreams import Application
+
+from panel_stats import PanelStats
+from producer_profile import ProducerProfile
+
+# for local dev, load env vars from a .env file
+from dotenv import load_dotenv
+load_dotenv()
+
+producer_profile = ProducerProfile.from_env()
+
+app = Application(consumer_group='panel-anomaly-v1',
+                auto_offset_reset='latest',
+                use_changelog_topics=False,
+                producer_extra_config=producer_profile.producer_config())
+
+input_topic = app.topic(os.environ['input'])
+output_topic = app.topic(os.environ['output'])
+
+min_irradiance = float(os.getenv('min_irradiance', '50'))
+
+stats = PanelStats(alpha=float(os.getenv('ewma_alpha', '0.1')),
+                   z_threshold=float(os.getenv('z_threshold', '2.5')),
+                   min_samples=int(os.getenv('min_samples', '30')),
+                   min_peers=int(os.getenv('min_peers', '3')),
+                   max_age=float(os.getenv('panel_max_age', '3600')))
+
+sdf = app.dataframe(input_topic)
+
+# Filter items out without data.
+sdf = sdf[sdf.contains('data')]
+
+def score_panel(row):
+    data = row['data']
+    panel_id = data.get('panel_id')
+    location_id = data.get('location_id')
+    if panel_id is None or location_id is None:
+        return {}
+
+    # Efficiency is meaningless at night / under heavy cloud, skip those readings.
+    irradiance = float(data.get('irradiance', 0))
+    if irradiance < min_irradiance:
+        # Still reporting, so keep it in the peer baseline
+        stats.touch(panel_id, location_id)
+        return {}
+
+    efficiency = float(data.get('power_output', 0)) / irradiance
+    score = stats.update(panel_id, location_id, efficiency)
+
+    return {
+        'timestamp': row.get('timestamp'),
+        'panel_id': panel_id,
+        'location_id': location_id,
+        'location_name': data.get('location_name'),
+        'power_output': data.get('power_output'),
+        'irradiance': irradiance,
+        **score
+    }
+
+sdf = sdf.apply(score_panel)
+
+# Only send panels that underperform against their peers.
+sdf = sdf[sdf.contains('underperforming')]
+sdf = sdf[sdf['underperforming'] == True]
+
+# Send the message to the output topic
+sdf.to_topic(output_topic)
+
+if __name__ == '__main__':
+    app.run()
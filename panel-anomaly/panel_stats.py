@@ -0,0 +1,188 @@
+import math
+import time
+from array import array
+
+
+class PanelStats:
+    """
+    Streaming per-panel statistics of efficiency (power_output / irradiance).
+
+    Every panel gets a slot (its index) in a set of flat typed arrays, so the
+    cost per panel is a few machine words instead of a dict per panel.
+    For each panel we keep a Welford running mean/variance and an EWMA of
+    its efficiency. For each location we keep the count, sum and sum of
+    squares of the EWMAs of its established panels (at least `min_samples`
+    readings), which lets a panel be compared to the rest of its location
+    in O(1) without scanning the peers.
+
+    Panels are keyed by `(location_id, panel_id)`, so panel ids only need to
+    be unique within a location. A panel that starts reporting another
+    location is tracked as a new panel there, its old entry expires.
+
+    Panels not seen for `max_age` seconds are expired: they leave the peer
+    baseline and their slot is reused by the next new panel.
+    """
+
+    def __init__(self, alpha=0.1, z_threshold=2.5, min_samples=30, min_peers=3,
+                 max_age=3600, clock=time.monotonic):
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.min_samples = min_samples
+        self.min_peers = min_peers
+        self.max_age = max_age
+        self.clock = clock
+
+        # (location id, panel id) / location id -> slot index
+        self.panel_index = {}
+        self.location_index = {}
+        # slots of expired panels, reused before the arrays grow
+        self._free_slots = []
+        self._last_expire = None
+
+        # per-panel state, indexed by panel slot
+        self.panel_location = array('l')
+        self.count = array('q')
+        self.mean = array('d')
+        self.m2 = array('d')
+        self.ewma = array('d')
+        self.last_seen = array('d')
+
+        # per-location peer state, indexed by location slot
+        self.peer_count = array('q')
+        self.peer_sum = array('d')
+        self.peer_sumsq = array('d')
+
+    def __len__(self):
+        return len(self.panel_index)
+
+    def _location_slot(self, location_id):
+        slot = self.location_index.get(location_id)
+        if slot is None:
+            slot = len(self.peer_count)
+            self.location_index[location_id] = slot
+            self.peer_count.append(0)
+            self.peer_sum.append(0.0)
+            self.peer_sumsq.append(0.0)
+        return slot
+
+    def _panel_slot(self, panel_id, location_id, now):
+        slot = self.panel_index.get((location_id, panel_id))
+        if slot is not None:
+            return slot
+
+        loc = self._location_slot(location_id)
+        if self._free_slots:
+            slot = self._free_slots.pop()
+            self.panel_location[slot] = loc
+            self.count[slot] = 0
+            self.mean[slot] = 0.0
+            self.m2[slot] = 0.0
+            self.ewma[slot] = 0.0
+            self.last_seen[slot] = now
+        else:
+            slot = len(self.count)
+            self.panel_location.append(loc)
+            self.count.append(0)
+            self.mean.append(0.0)
+            self.m2.append(0.0)
+            self.ewma.append(0.0)
+            self.last_seen.append(now)
+        self.panel_index[(location_id, panel_id)] = slot
+        return slot
+
+    def _add_peer(self, loc, value, sign):
+        self.peer_count[loc] += sign
+        self.peer_sum[loc] += sign * value
+        self.peer_sumsq[loc] += sign * value * value
+
+    def touch(self, panel_id, location_id, now=None):
+        """Mark a known panel as alive without adding a reading (e.g. at night)."""
+        slot = self.panel_index.get((location_id, panel_id))
+        if slot is not None:
+            self.last_seen[slot] = self.clock() if now is None else now
+
+    def update(self, panel_id, location_id, efficiency, now=None):
+        """Add one efficiency reading for a panel and return its score."""
+        now = self.clock() if now is None else now
+        self._maybe_expire(now)
+
+        i = self._panel_slot(panel_id, location_id, now)
+        loc = self.panel_location[i]
+        self.last_seen[i] = now
+
+        # Welford update
+        n = self.count[i] + 1
+        delta = efficiency - self.mean[i]
+        self.mean[i] += delta / n
+        self.m2[i] += delta * (efficiency - self.mean[i])
+        self.count[i] = n
+
+        # EWMA update. Panels join the peer aggregates once established,
+        # after that the old EWMA is swapped out for the new one.
+        old_ewma = self.ewma[i]
+        new_ewma = efficiency if n == 1 else old_ewma + self.alpha * (efficiency - old_ewma)
+        self.ewma[i] = new_ewma
+        if n > self.min_samples:
+            self._add_peer(loc, old_ewma, -1)
+        if n >= self.min_samples:
+            self._add_peer(loc, new_ewma, 1)
+
+        return self.score(i)
+
+    def _maybe_expire(self, now):
+        # A full scan, so only run it every tenth of max_age
+        if self._last_expire is None:
+            self._last_expire = now
+        elif now - self._last_expire >= self.max_age / 10:
+            self.expire(now)
+
+    def expire(self, now=None):
+        """Drop panels not seen for `max_age` seconds. Returns how many were dropped."""
+        now = self.clock() if now is None else now
+        self._last_expire = now
+
+        expired = [(key, slot) for key, slot in self.panel_index.items()
+                   if now - self.last_seen[slot] > self.max_age]
+        for key, slot in expired:
+            if self.count[slot] >= self.min_samples:
+                self._add_peer(self.panel_location[slot], self.ewma[slot], -1)
+            del self.panel_index[key]
+            self._free_slots.append(slot)
+        return len(expired)
+
+    def score(self, i):
+        """Compare panel slot `i` against the other panels at its location."""
+        loc = self.panel_location[i]
+        n = self.count[i]
+        ewma = self.ewma[i]
+
+        peers = self.peer_count[loc]
+        peer_sum = self.peer_sum[loc]
+        peer_sumsq = self.peer_sumsq[loc]
+        if n >= self.min_samples:
+            # Leave the panel itself out, otherwise a single bad panel drags
+            # its own baseline down and can never get far from it.
+            peers -= 1
+            peer_sum -= ewma
+            peer_sumsq -= ewma * ewma
+
+        peer_mean = peer_sum / peers if peers else 0.0
+        peer_var = peer_sumsq / peers - peer_mean * peer_mean if peers else 0.0
+        peer_std = math.sqrt(peer_var) if peer_var > 0 else 0.0
+
+        z_score = (ewma - peer_mean) / peer_std if peer_std > 0 else 0.0
+        underperforming = (n >= self.min_samples
+                           and peers >= self.min_peers
+                           and z_score < -self.z_threshold)
+
+        return {
+            'samples': n,
+            'efficiency_mean': self.mean[i],
+            'efficiency_std': math.sqrt(self.m2[i] / (n - 1)) if n > 1 else 0.0,
+            'efficiency_ewma': ewma,
+            'peer_count': peers,
+            'peer_mean': peer_mean,
+            'peer_std': peer_std,
+            'z_score': z_score,
+            'underperforming': underperforming,
+        }
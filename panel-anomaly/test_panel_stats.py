@@ -0,0 +1,67 @@
+from panel_stats import PanelStats
+
+
+def feed(stats, location_id, efficiencies, now=0.0, rounds=40):
+    """Send `rounds` readings for each panel, `efficiencies` maps panel id -> efficiency."""
+    score = {}
+    for _ in range(rounds):
+        for panel_id, efficiency in efficiencies.items():
+            score[panel_id] = stats.update(panel_id, location_id, efficiency, now=now)
+    return score
+
+
+def test_outlier_is_flagged():
+    stats = PanelStats(min_samples=30, min_peers=3)
+    peers = {f'panel-{i}': 0.20 + 0.005 * i for i in range(6)}
+    score = feed(stats, 'location-1', {**peers, 'broken': 0.05})
+
+    assert score['broken']['underperforming']
+    assert score['broken']['peer_count'] == 6
+    assert not any(score[panel_id]['underperforming'] for panel_id in peers)
+
+
+def test_panel_below_min_samples_stays_out_of_baseline():
+    stats = PanelStats(min_samples=30, min_peers=3)
+    feed(stats, 'location-1', {f'panel-{i}': 0.2 for i in range(4)})
+    score = feed(stats, 'location-1', {'new': 0.05}, rounds=10)
+
+    loc = stats.location_index['location-1']
+    assert stats.peer_count[loc] == 4
+    assert abs(stats.peer_sum[loc] - 0.8) < 1e-9
+    # Not established yet, so it can't be flagged either
+    assert score['new']['peer_count'] == 4
+    assert not score['new']['underperforming']
+
+
+def test_expire_removes_panels_from_baseline():
+    stats = PanelStats(min_samples=5, max_age=100)
+    feed(stats, 'location-1', {f'panel-{i}': 0.2 + 0.01 * i for i in range(5)}, rounds=10)
+
+    assert stats.expire(now=101) == 5
+    assert len(stats) == 0
+    loc = stats.location_index['location-1']
+    assert stats.peer_count[loc] == 0
+    assert abs(stats.peer_sum[loc]) < 1e-9
+    assert abs(stats.peer_sumsq[loc]) < 1e-9
+
+
+def test_touch_keeps_panel_alive():
+    stats = PanelStats(min_samples=5, max_age=100)
+    feed(stats, 'location-1', {'panel-1': 0.2, 'panel-2': 0.2}, rounds=10)
+    stats.touch('panel-1', 'location-1', now=90)
+
+    assert stats.expire(now=150) == 1
+    assert ('location-1', 'panel-1') in stats.panel_index
+
+
+def test_same_panel_id_at_two_locations_is_kept_apart():
+    stats = PanelStats(min_samples=5)
+    a = feed(stats, 'location-a', {'panel-1': 0.2}, rounds=10)
+    b = feed(stats, 'location-b', {'panel-1': 0.1}, rounds=10)
+
+    assert len(stats) == 2
+    assert a['panel-1']['samples'] == 10
+    assert b['panel-1']['samples'] == 10
+    assert abs(b['panel-1']['efficiency_mean'] - 0.1) < 1e-9
+    for location_id in ('location-a', 'location-b'):
+        assert stats.peer_count[stats.location_index[location_id]] == 1
@@ -0,0 +1,49 @@
+"""
+Check that modules shared between services are identical in every service.
+
+Each service is built from its own folder, so shared code like
+producer_profile.py is copied into every service that uses it. Any module
+found in more than one service folder must have the same content
+everywhere, unless it is listed in NOT_SHARED:
+
+    python scripts/check_shared_modules.py
+"""
+import glob
+import os
+import sys
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Service-specific modules that happen to share a name
+NOT_SHARED = {'main.py', 'batch_transforms.py'}
+
+
+def main():
+    copies = defaultdict(list)
+    for path in sorted(glob.glob(os.path.join(ROOT, '*', '*.py'))):
+        name = os.path.basename(path)
+        if name not in NOT_SHARED:
+            copies[name].append(path)
+
+    failed = False
+    for name, paths in sorted(copies.items()):
+        if len(paths) < 2:
+            continue
+        contents = {}
+        for path in paths:
+            with open(path, 'rb') as f:
+                contents.setdefault(f.read(), []).append(os.path.relpath(path, ROOT))
+        if len(contents) > 1:
+            failed = True
+            print(f"{name} differs between copies:")
+            for group in contents.values():
+                print(f"  {', '.join(group)}")
+        else:
+            print(f"{name}: {len(paths)} identical copies")
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())